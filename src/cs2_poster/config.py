@@ -1,30 +1,61 @@
 """Configuration loading for the application."""
 
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
+
 from .data_models import AppConfig, RedditCredentials
 
+# Variables without a default
+_REQUIRED_ENV_VARS = frozenset(
+    {
+        "PRAW_CLIENT_ID",
+        "PRAW_CLIENT_SECRET",
+        "PRAW_REFRESH_TOKEN",
+        "PRAW_USER_AGENT",
+        "REDDIT_SUBREDDIT",
+    }
+)
+
 
+@lru_cache(maxsize=1)
 def load_configuration() -> AppConfig:
     """Loads application configuration from environment variables.
 
-    Uses .env file for development environments.
+    The .env file, if any, is loaded once by the CLI entry point before this
+    runs. The result is cached, so repeated calls within a process return the
+    same (read-only) instance.
+
+    Raises:
+        ValueError: If any required environment variable is missing.
     """
-    load_dotenv()  # Load from .env file if present
+    env = dict(os.environ)  # Snapshot once instead of repeated os.environ lookups
+
+    missing = _REQUIRED_ENV_VARS - env.keys()
+    if missing:
+        raise ValueError(
+            f"Missing required environment variables: {', '.join(sorted(missing))}"
+        )
 
     reddit_creds = RedditCredentials(
-        client_id=os.environ["PRAW_CLIENT_ID"],
-        client_secret=os.environ["PRAW_CLIENT_SECRET"],
-        refresh_token=os.environ["PRAW_REFRESH_TOKEN"],
-        user_agent=os.environ["PRAW_USER_AGENT"],
+        client_id=env["PRAW_CLIENT_ID"],
+        client_secret=env["PRAW_CLIENT_SECRET"],
+        refresh_token=env["PRAW_REFRESH_TOKEN"],
+        user_agent=env["PRAW_USER_AGENT"],
     )
 
     return AppConfig(
         steam_poll_interval_seconds=int(
-            os.environ.get("STEAM_POLL_INTERVAL_SECONDS", 10)
+            env.get("STEAM_POLL_INTERVAL_SECONDS", 10)
+        ),
+        steam_max_poll_interval_seconds=int(
+            env.get("STEAM_MAX_POLL_INTERVAL_SECONDS", 300)
+        ),
+        reddit_min_post_interval_seconds=int(
+            env.get("REDDIT_MIN_POST_INTERVAL_SECONDS", 7200)
         ),
-        state_file_path=os.environ.get("STATE_FILE_PATH", "app_state.json"),
+        state_file_path=env.get("STATE_FILE_PATH", "app_state.json"),
         reddit_credentials=reddit_creds,
-        reddit_subreddit=os.environ["REDDIT_SUBREDDIT"],
-        reddit_flair_text=os.environ.get("REDDIT_FLAIR_TEXT", "Game Update"),
+        reddit_subreddit=env["REDDIT_SUBREDDIT"],
+        reddit_flair_text=env.get("REDDIT_FLAIR_TEXT", "Game Update"),
+        debug=env.get("APP_ENV") == "dev",
     )
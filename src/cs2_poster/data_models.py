@@ -4,14 +4,14 @@ from dataclasses import dataclass, field
 from typing import List, Optional  # Added Dict and Any based on spec
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SteamApiResponse:
     """Represents the top-level structure of the Steam API response."""
 
     events: List["SteamEvent"]  # Forward reference for SteamEvent
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class AnnouncementBody:
     """Represents the detailed announcement content within a Steam event."""
 
@@ -34,7 +34,7 @@ class AnnouncementBody:
     banned: int
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class SteamEvent:
     """Represents a raw event structure from the Steam API.
     Updated based on sample JSON structure.
@@ -79,7 +79,7 @@ class SteamEvent:
     build_branch: Optional[str] = None
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ParsedSteamEvent:
     """Represents the essential information extracted from a Steam event's announcement body."""
 
@@ -96,7 +96,7 @@ class ParsedSteamEvent:
     sequence_number: int = 1  # Which patch note this is for the day (1 = first, 2 = second, etc.)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class RedditCredentials:
     """Stores Reddit API credentials, loaded from environment variables."""
 
@@ -112,7 +112,7 @@ class RedditCredentials:
     )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class AppConfig:
     """Main application configuration, loaded from environment variables."""
 
@@ -122,4 +122,7 @@ class AppConfig:
         "Game Update"  # Optional: Flair text to apply, e.g., "Game Update"
     )
     steam_poll_interval_seconds: int = 10
+    reddit_min_post_interval_seconds: int = 7200  # Minimum time between two posts
+    steam_max_poll_interval_seconds: int = 300  # Upper bound for idle backoff
     state_file_path: str = "app_state.json"
+    debug: bool = False  # Attach tracebacks to recoverable error logs
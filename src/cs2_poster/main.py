@@ -1,134 +1,42 @@
 """Main application entry point for the CS2 Update Announcer."""
 
+from __future__ import annotations
+
+import argparse
+import signal
 import sys
-import time
-from typing import Optional, Tuple
-import praw
-from urllib.parse import urlparse, parse_qs
+import threading
+from typing import TYPE_CHECKING, Optional
 
-import typer
+from dotenv import load_dotenv
 from loguru import logger
 
 from .config import load_configuration
-from .data_models import AppConfig, ParsedSteamEvent
-from .logging_setup import setup_logging
-from .reddit_client import RedditClient
-from .state_manager import (
-    get_last_processed_posttime,
-    load_state,
-    save_state,
-    set_last_processed_posttime,
-    get_last_reddit_post_time,
-    set_last_reddit_post_time,
-)
-from .steam_client import SteamClient
-
-app = typer.Typer(help="Monitors CS2 game updates and posts them to Reddit.")
-# Create a new Typer app for the refresh token command to keep it separate
-auth_app = typer.Typer(
-    name="auth",
-    help="Authentication utilities, e.g., for generating a new Reddit refresh token.",
-)
-app.add_typer(auth_app)
-
-
-def initialize_polling_state(
-    config: AppConfig,
-) -> Tuple[object, Optional[int], Optional[int]]:
-    """Initialize and return the polling state."""
-    app_state = load_state(config)
-    last_posttime = get_last_processed_posttime(app_state)
-    last_reddit_post_time = get_last_reddit_post_time(app_state)
-
-    logger.info(f"Initial last processed event posttime: {last_posttime}")
-    logger.info(f"Initial last Reddit post time: {last_reddit_post_time}")
-
-    return app_state, last_posttime, last_reddit_post_time
-
-
-def should_skip_due_to_rate_limit(last_reddit_post_time: Optional[int]) -> bool:
-    """Check if we should skip posting due to rate limiting."""
-    if last_reddit_post_time is None:
-        return False
-
-    current_time = int(time.time())
-    time_since_last_post = current_time - last_reddit_post_time
-
-    if time_since_last_post < 7200:  # 2 hours
-        wait_time = 7200 - time_since_last_post
-        logger.warning(
-            f"Reddit post rate limit in effect. Last post was {time_since_last_post} seconds ago. "
-            f"Next post allowed in {wait_time} seconds."
-        )
-        return True
-
-    return False
-
-
-def process_event(
-    event: ParsedSteamEvent,
-    app_state: object,
-    config: AppConfig,
-    reddit_client: RedditClient,
-    last_reddit_post_time: Optional[int],
-) -> Tuple[int, Optional[int]]:
-    """Process a single event and return updated timestamps."""
-    logger.info(f"Processing event: GID '{event.gid}', Title '{event.title}'")
-
-    # Check rate limit
-    if should_skip_due_to_rate_limit(last_reddit_post_time):
-        # Update state but skip posting
-        set_last_processed_posttime(app_state, event.timestamp)
-        save_state(app_state, config)
-        return event.timestamp, last_reddit_post_time
-
-    # Attempt to post
-    success = reddit_client.post_update(event)
-    if success:
-        current_time = int(time.time())
-        set_last_processed_posttime(app_state, event.timestamp)
-        set_last_reddit_post_time(app_state, current_time)
-        save_state(app_state, config)
-        logger.info(f"Successfully processed and posted event GID: {event.gid}")
-        return event.timestamp, current_time
-    else:
-        logger.error(
-            f"Failed to post event GID: {event.gid}. Will retry in next cycle."
-        )
-        return event.timestamp, last_reddit_post_time
-
-
-def polling_loop(
-    config: AppConfig, steam_client: SteamClient, reddit_client: RedditClient
-):
-    """The main polling loop for fetching updates and posting them."""
-    app_state, last_posttime, last_reddit_post_time = initialize_polling_state(config)
-
-    while True:
-        logger.info("Polling for new CS2 updates...")
-        try:
-            event = steam_client.fetch_latest_event(last_event_posttime=last_posttime)
-
-            if not event:
-                logger.info("No new event to post.")
-            else:
-                last_posttime, last_reddit_post_time = process_event(
-                    event, app_state, config, reddit_client, last_reddit_post_time
-                )
-
-        except Exception as e:
-            logger.error(f"Unexpected error in polling loop: {e}", exc_info=True)
-            time.sleep(30)  # Wait 30 seconds after error
-            continue
-
-        logger.debug(
-            f"Waiting {config.steam_poll_interval_seconds} seconds before next poll..."
-        )
-        time.sleep(config.steam_poll_interval_seconds)
+from .data_models import AppConfig
+
+if TYPE_CHECKING:
+    # praw and the polling runtime (Steam/Reddit clients) are imported lazily
+    # by the command that needs them to keep CLI startup light.
+    import praw
+
+# Set by signal_handler; the polling loop waits on it instead of sleeping so
+# that shutdown does not have to wait out the current poll interval.
+stop_event = threading.Event()
+
+
+def signal_handler(signum, frame) -> None:
+    """Requests a graceful shutdown of the polling loop."""
+    logger.info(f"Received signal {signal.Signals(signum).name}. Shutting down...")
+    stop_event.set()
+    # A second Ctrl+C falls back to KeyboardInterrupt, e.g. to abort a
+    # shutdown stuck in a blocking call that never checks stop_event.
+    signal.signal(signal.SIGINT, signal.default_int_handler)
 
 
 def setup_praw(app_config: AppConfig) -> praw.Reddit:
     """Setup Reddit authentication for token generation."""
+    import praw  # Only needed by the interactive auth command
+
     creds = app_config.reddit_credentials
     if not all([creds.client_id, creds.client_secret, creds.user_agent]):
         raise ValueError(
@@ -145,6 +53,8 @@ def setup_praw(app_config: AppConfig) -> praw.Reddit:
 
 def get_auth_code_from_user(reddit_auth: praw.Reddit) -> str:
     """Get authorization code from user interaction."""
+    from urllib.parse import unquote_plus
+
     auth_url = reddit_auth.auth.url(
         scopes=["identity", "submit", "read", "flair"],
         state="cs2poster-auth",
@@ -154,25 +64,28 @@ def get_auth_code_from_user(reddit_auth: praw.Reddit) -> str:
     logger.info("Please open this URL in your browser:")
     logger.info(auth_url)
 
-    redirect_url = typer.prompt(
-        "After authorizing, paste the full redirect URL (starting with http://localhost:8080)"
-    )
+    redirect_url = input(
+        "After authorizing, paste the full redirect URL (starting with http://localhost:8080): "
+    ).strip()
 
     if not redirect_url:
         raise ValueError("No redirect URL provided")
 
-    # Extract auth code from redirect URL
-    parsed_url = urlparse(redirect_url)
-    query_params = parse_qs(parsed_url.query)
-    auth_code_list = query_params.get("code")
+    # Extract auth code from redirect URL; only "code" is needed, so scan the
+    # query directly instead of decoding every parameter.
+    query = redirect_url.partition("?")[2].partition("#")[0]
+    auth_code = ""
+    for pair in query.split("&"):
+        if pair.startswith("code="):
+            auth_code = unquote_plus(pair[5:]).strip()
+            break
 
-    if not auth_code_list or not auth_code_list[0]:
+    if not auth_code:
         raise ValueError("Could not find 'code' parameter in the redirect URL")
 
-    return auth_code_list[0].strip()
+    return auth_code
 
 
-@auth_app.command("refresh-token")
 def generate_refresh_token():
     """Generate a new Reddit refresh token."""
     logger.info("Starting refresh token generation...")
@@ -192,29 +105,18 @@ def generate_refresh_token():
 
     except Exception as e:
         logger.error(f"Error generating refresh token: {e}", exc_info=True)
-        raise typer.Exit(code=1)
-
-
-def initialize_clients(app_config: AppConfig) -> Tuple[SteamClient, RedditClient]:
-    """Initialize and return Steam and Reddit clients."""
-    try:
-        steam_client = SteamClient(app_config)
-        reddit_client = RedditClient(app_config)
-
-        if not reddit_client.reddit:
-            raise RuntimeError("Reddit client failed to initialize")
-
-        return steam_client, reddit_client
-
-    except Exception as e:
-        logger.critical(f"Failed to initialize clients: {e}", exc_info=True)
         sys.exit(1)
 
 
-@app.command()
 def main():
     """Entry point for the CS2 Update Announcer application."""
+    from .logging_setup import setup_logging
+
     setup_logging()
+    # Only the polling loop watches stop_event; other commands (e.g. the
+    # interactive auth prompt) keep the default Ctrl+C behaviour.
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
 
     try:
         app_config = load_configuration()
@@ -224,15 +126,58 @@ def main():
 
     logger.info("CS2 Update Announcer starting...")
 
-    steam_client, reddit_client = initialize_clients(app_config)
+    from .runtime import initialize_clients, polling_loop
+
+    steam_client, reddit_client = initialize_clients(app_config, stop_event)
 
     try:
-        polling_loop(app_config, steam_client, reddit_client)
+        polling_loop(app_config, steam_client, reddit_client, stop_event)
     except KeyboardInterrupt:
         logger.info("KeyboardInterrupt received. Shutting down...")
+    except Exception as e:
+        # Fail fast so a supervisor restarts a clean process
+        logger.opt(exception=True).critical(f"Fatal error in polling loop: {e}")
+        sys.exit(1)
+    finally:
+        # Release the pooled keep-alive connections to Steam
+        steam_client.close()
 
     logger.info("CS2 Update Announcer shut down.")
 
 
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser.
+
+    Commands: ``main`` (the default) runs the announcer and
+    ``auth refresh-token`` generates a new Reddit refresh token.
+    """
+    parser = argparse.ArgumentParser(
+        description="Monitors CS2 game updates and posts them to Reddit."
+    )
+    parser.set_defaults(handler=main)
+    commands = parser.add_subparsers(title="commands")
+    commands.add_parser("main", help=main.__doc__).set_defaults(handler=main)
+
+    # Keep the refresh token command in its own group
+    auth_parser = commands.add_parser(
+        "auth",
+        help="Authentication utilities, e.g., for generating a new Reddit refresh token.",
+    )
+    auth_commands = auth_parser.add_subparsers(title="commands", required=True)
+    auth_commands.add_parser(
+        "refresh-token", help=generate_refresh_token.__doc__
+    ).set_defaults(handler=generate_refresh_token)
+    return parser
+
+
+def cli(argv: Optional[list[str]] = None) -> None:
+    """Parse the command line and run the selected command."""
+    args = build_parser().parse_args(argv)
+    # Loaded once here, before setup_logging (APP_ENV, LOG_FILE_LEVEL) and
+    # load_configuration read the environment
+    load_dotenv()
+    args.handler()
+
+
 if __name__ == "__main__":
-    app()  # Use Typer to run the CLI application
+    cli()
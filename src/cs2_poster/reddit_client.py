@@ -3,23 +3,195 @@
 import praw
 import prawcore
 from loguru import logger
-from datetime import datetime, UTC
+from functools import lru_cache
 import bbcode
-import html2text
-from typing import Optional
-import re
+from typing import Any, Dict, Iterator, Optional
+import random
+import threading
+import time
 
 from .data_models import AppConfig, ParsedSteamEvent
 
+# Retry policy for transient submission failures (exponential backoff + jitter)
+SUBMIT_MAX_ATTEMPTS = 5
+SUBMIT_RETRY_BASE_SECONDS = 1.0
+SUBMIT_RETRY_CAP_SECONDS = 60.0
+
+SECONDS_PER_DAY = 86400
+
+
+@lru_cache(maxsize=128)
+def _title_date(day: int) -> str:
+    """Formats a UTC day number (Unix time // SECONDS_PER_DAY) for post titles."""
+    return time.strftime("%m/%d/%Y", time.gmtime(day * SECONDS_PER_DAY))
+
+
+def _format_markdown_lines(markdown: str) -> Iterator[str]:
+    """Yields the converted Markdown's lines with section/subsection headings applied."""
+    previous_blank = True  # Also drops blank lines at the start
+    for line in markdown.splitlines():
+        stripped = line.rstrip()
+        if not stripped:
+            # Block tags each add blank lines; keep at most one in a row
+            if not previous_blank:
+                yield ""
+            previous_blank = True
+            continue
+        previous_blank = False
+        if len(stripped) > 2 and stripped[0] == "[" and stripped[-1] == "]":
+            # Section: [ SECTION_TITLE ] -> ### SECTION_TITLE
+            yield f"### {stripped[1:-1].strip()}"
+        elif (
+            len(stripped) > 1
+            and stripped[-1] == ":"
+            and not stripped[0].isspace()
+            and stripped[0] not in "-*+"
+            and ":" not in stripped[1:-1]
+        ):
+            # Subsection: SUBSECTION_TITLE: -> #### SUBSECTION_TITLE (not in bullet/indented)
+            yield f"#### {stripped[:-1].strip()}"
+        else:
+            yield line
+
+
+class MarkdownParser(bbcode.Parser):
+    """BBCode parser whose formatters emit Markdown instead of HTML.
+
+    Covers the tags Steam announcements use; unrecognised tags are left as text.
+    Line breaks inside paragraphs become Markdown hard breaks ("\r" is the
+    parser's placeholder for them).
+    """
+
+    def __init__(self):
+        super().__init__(
+            newline="  \n",
+            install_defaults=False,
+            escape_html=False,
+            replace_links=False,
+            replace_cosmetic=False,
+        )
+        self.install_markdown_formatters()
+
+    def format(self, data, **context):
+        if self.tag_opener not in data:
+            # No tags: only line breaks change, so skip tokenizing entirely
+            data = data.replace("\r\n", "\n").replace("\r", "\n")
+            return data.replace("\n", self.newline)
+        return super().format(data, **context)
+
+    def add_formatter(self, tag_name, render_func, **kwargs):
+        # HTML escaping, link and cosmetic replacement are per-tag options in
+        # bbcode, so turn them off for every tag, not just the parser default
+        kwargs.setdefault("escape_html", False)
+        kwargs.setdefault("replace_links", False)
+        kwargs.setdefault("replace_cosmetic", False)
+        super().add_formatter(tag_name, render_func, **kwargs)
+
+    def install_markdown_formatters(self) -> None:
+        """Installs Markdown formatters for the supported tags."""
+        self.add_simple_formatter("b", "**%(value)s**")
+        self.add_simple_formatter("i", "_%(value)s_")
+        self.add_simple_formatter("s", "~~%(value)s~~")
+        for tag_name in ("u", "sub", "sup", "center", "color", "size"):
+            self.add_simple_formatter(tag_name, "%(value)s")
+        self.add_simple_formatter("hr", "\n\n* * *\n\n", standalone=True)
+        # Steam image URLs use a {STEAM_CLAN_IMAGE} placeholder; drop them
+        self.add_simple_formatter("img", "", render_embedded=False)
+        self.add_simple_formatter(
+            "p", "%(value)s\n\n", strip=True, swallow_trailing_newline=True
+        )
+        for level in (1, 2, 3):
+            self.add_simple_formatter(
+                f"h{level}",
+                f"\n\n{'#' * level} %(value)s\n\n",
+                strip=True,
+                swallow_trailing_newline=True,
+            )
+        self.add_formatter(
+            "list",
+            self._render_list,
+            transform_newlines=False,
+            strip=True,
+            swallow_trailing_newline=True,
+        )
+        self.add_formatter(
+            "*",
+            self._render_list_item,
+            newline_closes=True,
+            transform_newlines=False,
+            same_tag_closes=True,
+            strip=True,
+        )
+        self.add_formatter(
+            "quote", self._render_quote, strip=True, swallow_trailing_newline=True
+        )
+        self.add_simple_formatter(
+            "code",
+            "\n\n```\n%(value)s\n```\n\n",
+            render_embedded=False,
+            transform_newlines=False,
+            swallow_trailing_newline=True,
+        )
+        self.add_formatter("url", self._render_url)
+
+    @staticmethod
+    def _render_list(name, value, options, parent, context):
+        if options and options.get("list", "*") != "*":
+            # [list=1], [list=a], ...: Markdown only has numbered lists
+            lines = value.split("\n")
+            number = 0
+            for i, line in enumerate(lines):
+                if line.startswith("* "):
+                    number += 1
+                    lines[i] = f"{number}. {line[2:]}"
+            value = "\n".join(lines)
+        return f"\n\n{value}\n\n"
+
+    @staticmethod
+    def _render_list_item(name, value, options, parent, context):
+        # Continuation lines are indented so they stay inside the item
+        value = value.replace("\n", "\n  ")
+        if not parent or parent.tag_name != "list":
+            return f"[*]{value}\r"
+        return f"* {value}\n"
+
+    @staticmethod
+    def _render_quote(name, value, options, parent, context):
+        return "\n\n> " + value.replace("\r", "\n> ") + "\n\n"
+
+    @staticmethod
+    def _render_url(name, value, options, parent, context):
+        href = options["url"] if options and "url" in options else value
+        # Ignore script "links", like the default HTML formatter does
+        if href.split(":", 1)[0].strip().lower() in ("javascript", "data", "vbscript"):
+            return value
+        if href == value:
+            return f"<{href}>"
+        return f"[{value}]({href})"
+
 
 class RedditClient:
     """Handles authentication with Reddit and posting updates."""
 
-    def __init__(self, config: AppConfig):
+    def __init__(self, config: AppConfig, stop: Optional[threading.Event] = None):
         self.config = config.reddit_credentials
         self.target_subreddit = config.reddit_subreddit
         self.reddit_flair_text = config.reddit_flair_text
+        self.debug = config.debug
+        self.min_post_interval_seconds = config.reddit_min_post_interval_seconds
+        # Earliest wall-clock time a new submission may be attempted
+        self.next_post_allowed_at: float = 0.0
         self.reddit: praw.Reddit
+        # Reddit API quota from the X-Ratelimit-* headers of the last request
+        self.ratelimit_remaining: Optional[float] = None
+        self.ratelimit_reset_timestamp: Optional[float] = None
+        self._authed = False
+        # Resolved flair IDs per flair text; None means "not found"
+        self._flair_cache: Dict[str, Optional[str]] = {}
+        # The BBCode parser is stateless, so build it (and its tag table) once
+        self._bbcode_parser = MarkdownParser()
+        # Set on shutdown; interrupts back-off waits between submit attempts
+        self._stop = stop if stop is not None else threading.Event()
         self._initialize_praw()
 
     def _initialize_praw(self) -> None:
@@ -31,12 +203,12 @@ class RedditClient:
                 refresh_token=self.config.refresh_token,
                 user_agent=self.config.user_agent,
             )
-            # Check if authentication is working by fetching a basic piece of info
-            # (e.g., bot's username or subreddit display name)
-            # This will raise an exception if auth fails (e.g., bad refresh token)
-            logger.info(
-                f"PRAW initialized. Authenticated as user: {self.reddit.user.me()}"
-            )
+            # The target never changes, so build its (lazy, network-free)
+            # Subreddit model once for flair lookups and submissions.
+            self._subreddit = self.reddit.subreddit(self.target_subreddit)
+            # Authentication is validated lazily on the first post (see
+            # _ensure_authed) to keep a network round-trip out of startup.
+            logger.info("PRAW initialized.")
             logger.info(f"Target subreddit: {self.target_subreddit}")
         except prawcore.exceptions.OAuthException as e:
             logger.critical(
@@ -51,9 +223,46 @@ class RedditClient:
             )
             raise
 
+    def _ensure_authed(self) -> bool:
+        """Verifies the credentials once by fetching the bot's identity.
+
+        Returns True if authentication works, False otherwise.
+        """
+        if self._authed:
+            return True
+        try:
+            # This will raise an exception if auth fails (e.g., bad refresh token)
+            logger.info(f"Authenticated as user: {self.reddit.user.me()}")
+        except prawcore.exceptions.OAuthException as e:
+            logger.opt(exception=self.debug).critical(
+                f"Reddit OAuthException while validating credentials: {e}. Check PRAW credentials, especially refresh_token."
+            )
+            return False
+        except Exception as e:
+            logger.opt(exception=self.debug).error(
+                f"Failed to validate Reddit credentials: {e}"
+            )
+            return False
+        self._authed = True
+        return True
+
+    def note_last_post_time(self, posted_at: float) -> None:
+        """Moves next_post_allowed_at past the minimum interval after a post."""
+        # A post time in the future means the clock stepped back; treat it as now
+        posted_at = min(posted_at, time.time())
+        self.next_post_allowed_at = max(
+            self.next_post_allowed_at, posted_at + self.min_post_interval_seconds
+        )
+
+    def _record_rate_limits(self) -> None:
+        """Stores the API quota PRAW parsed from Reddit's X-Ratelimit-* headers."""
+        limits = self.reddit.auth.limits
+        self.ratelimit_remaining = limits.get("remaining")
+        self.ratelimit_reset_timestamp = limits.get("reset_timestamp")
+
     def _format_post_title(self, event: ParsedSteamEvent) -> str:
         """Formats the title for the Reddit post."""
-        date_str = datetime.fromtimestamp(event.timestamp, UTC).strftime("%m/%d/%Y")
+        date_str = _title_date(event.timestamp // SECONDS_PER_DAY)
         base_title = f"Counter-Strike 2 Update for {date_str}"
         
         # Add sequence number suffix if this is not the first patch note of the day
@@ -64,62 +273,43 @@ class RedditClient:
 
     def _convert_bbcode_to_markdown(self, bbcode_text: str) -> str:
         """Converts BBCode text to Markdown, then applies custom formatting for sections and subsections."""
-        # First, convert BBCode to HTML
-        parser = bbcode.Parser()
-        html_output = parser.format(bbcode_text)
-
-        # Then, convert HTML to Markdown
-        h = html2text.HTML2Text()
-        markdown_output = h.handle(html_output)
+        # The parser's formatters emit Markdown directly (no HTML round-trip)
+        markdown_output = self._bbcode_parser.format(bbcode_text)
         markdown_output = (
             markdown_output.strip()
         )  # Remove any leading/trailing whitespace
 
         # Post-process for custom section/subsection formatting
-        processed_lines = []
-        section_pattern = re.compile(r"^\[\s*(.+?)\s*\]\s*$")
-        subsection_pattern = re.compile(r"^([^\s\-*+][^:]*?):\s*$")
-        for line in markdown_output.splitlines():
-            # Section: [ SECTION_TITLE ] -> ## SECTION_TITLE
-            section_match = section_pattern.match(line)
-            if section_match:
-                processed_lines.append(f"### {section_match.group(1).strip()}")
-                continue
-            # Subsection: SUBSECTION_TITLE: -> ### SUBSECTION_TITLE (not in bullet/indented)
-            subsection_match = subsection_pattern.match(line)
-            if subsection_match:
-                processed_lines.append(f"#### {subsection_match.group(1).strip()}")
-                continue
-            processed_lines.append(line)
-        return "\n".join(processed_lines)
+        return "\n".join(_format_markdown_lines(markdown_output))
 
     def _format_post_body(self, event: ParsedSteamEvent) -> str:
         """Formats the body for the Reddit post (Markdown).
 
-        Includes the event body (BBCode) and a link to the original announcement.
+        The body is the event's BBCode content converted to Markdown.
         """
-        body_parts = []
-        # Convert BBCode to Markdown before appending
-        markdown_body = self._convert_bbcode_to_markdown(event.body_bbcode)
-        body_parts.append(markdown_body)
+        return self._convert_bbcode_to_markdown(event.body_bbcode)
 
-        return "\n".join(body_parts)
-
-    def _find_flair_id(self, subreddit_name: str, flair_text: str) -> Optional[str]:
-        """Finds the ID of a flair by its text on a subreddit."""
+    def _find_flair_id(self, flair_text: str) -> Optional[str]:
+        """Finds the ID of a flair by its text on the target subreddit."""
         if not flair_text:
             return None
+        # Flair templates rarely change, so only ask Reddit once per process
+        if flair_text in self._flair_cache:
+            return self._flair_cache[flair_text]
+        subreddit_name = self.target_subreddit
         try:
-            flairs = self.reddit.subreddit(subreddit_name).flair.link_templates
+            flairs = list(self._subreddit.flair.link_templates)
             for flair in flairs:
                 if flair["text"] == flair_text:
                     logger.debug(
                         f"Found flair ID '{flair['id']}' for text '{flair_text}' on r/{subreddit_name}"
                     )
+                    self._flair_cache[flair_text] = flair["id"]
                     return flair["id"]
             logger.warning(
                 f"Flair with text '{flair_text}' not found on r/{subreddit_name}. Available flairs: {[f['text'] for f in flairs]}"
             )
+            self._flair_cache[flair_text] = None
         except prawcore.exceptions.Forbidden:
             logger.warning(
                 f"Bot does not have permission to access flairs on r/{subreddit_name}. Cannot apply flair."
@@ -133,15 +323,21 @@ class RedditClient:
 
     def _handle_submission_error(self, e: Exception, subreddit_name: str) -> None:
         """Handle common submission errors with appropriate logging."""
+        # Expected API failures only carry a traceback in debug mode
+        if isinstance(e, prawcore.exceptions.TooManyRequests):
+            # Honour the server's back-off before the next submission attempt
+            retry_after = e.response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                self.next_post_allowed_at = max(
+                    self.next_post_allowed_at, time.time() + int(retry_after)
+                )
         if isinstance(e, prawcore.exceptions.Forbidden):
-            logger.error(
-                f"Reddit API error (Forbidden 403): {e}. Check bot permissions on r/{subreddit_name}. Does the bot have posting rights? Is it banned?",
-                exc_info=True,
+            logger.opt(exception=self.debug).error(
+                f"Reddit API error (Forbidden 403): {e}. Check bot permissions on r/{subreddit_name}. Does the bot have posting rights? Is it banned?"
             )
         elif isinstance(e, prawcore.exceptions.PrawcoreException):
-            logger.error(
-                f"Reddit API error while posting to r/{subreddit_name}: {e}",
-                exc_info=True,
+            logger.opt(exception=self.debug).error(
+                f"Reddit API error while posting to r/{subreddit_name}: {e}"
             )
         else:
             logger.error(
@@ -149,6 +345,41 @@ class RedditClient:
                 exc_info=True,
             )
 
+    def _submit_with_retry(
+        self, submission_params: Dict[str, Any]
+    ) -> praw.models.Submission:
+        """Submits a post, retrying rate-limited (429) responses.
+
+        A 429 means the post was not created, so it is safe to resend. Server
+        (5xx) and network errors are not retried since the post may have been
+        created anyway. Other errors, a Retry-After longer than
+        SUBMIT_RETRY_CAP_SECONDS (left to next_post_allowed_at by the caller),
+        a shutdown request during a back-off, and the last 429 once attempts
+        are exhausted are re-raised.
+        """
+        for attempt in range(SUBMIT_MAX_ATTEMPTS - 1):
+            try:
+                return self._subreddit.submit(**submission_params)
+            except prawcore.exceptions.TooManyRequests as e:
+                retry_after = e.response.headers.get("Retry-After", "")
+                if retry_after.isdigit():
+                    delay = float(retry_after)
+                    if delay > SUBMIT_RETRY_CAP_SECONDS:
+                        raise  # Too long to block the polling loop on
+                else:
+                    delay = min(
+                        SUBMIT_RETRY_CAP_SECONDS,
+                        SUBMIT_RETRY_BASE_SECONDS * 2**attempt,
+                    ) * random.uniform(0.5, 1.5)
+                logger.warning(
+                    f"Rate limited by Reddit while posting: {e}. Retrying in {delay:.1f} seconds "
+                    f"(attempt {attempt + 1}/{SUBMIT_MAX_ATTEMPTS})."
+                )
+                if self._stop.wait(delay):
+                    raise  # Shutting down; give up on this post
+        # Final attempt; any error propagates to the caller
+        return self._subreddit.submit(**submission_params)
+
     def post_update(self, event: ParsedSteamEvent) -> bool:
         """Submits a new post to the configured subreddit for the given event.
 
@@ -156,8 +387,12 @@ class RedditClient:
         For general announcements: Posts as link post with announcement title
 
         Returns True if successful, False otherwise.
-        This method is async, but PRAW calls are synchronous, so they are run in a thread.
+        This blocks on PRAW's (synchronous) HTTP calls; the polling loop runs it
+        inline, as it has nothing else to do while a post is in flight.
         """
+        if not self._ensure_authed():
+            return False
+
         subreddit_name = self.target_subreddit
         flair_id_to_use = None
 
@@ -165,9 +400,7 @@ class RedditClient:
             logger.info(
                 f"Attempting to find flair ID for '{self.reddit_flair_text}' on r/{subreddit_name}"
             )
-            flair_id_to_use = self._find_flair_id(
-                subreddit_name, self.reddit_flair_text
-            )
+            flair_id_to_use = self._find_flair_id(self.reddit_flair_text)
             if flair_id_to_use:
                 logger.info(
                     f"Using flair ID: {flair_id_to_use} for flair text: '{self.reddit_flair_text}'"
@@ -178,12 +411,15 @@ class RedditClient:
                 )
 
         # Prepare submission parameters based on event type
+        formatted_body = None
         if event.is_cs2_patchnote:
             title = self._format_post_title(event)
+            # Converted once; reused below for the reply comment
+            formatted_body = self._format_post_body(event)
             submission_params = {
                 "title": title,
                 "url": event.url,
-                "selftext": self._format_post_body(event),
+                "selftext": formatted_body,
                 "send_replies": False,
             }
             post_type = "CS2 update"
@@ -202,17 +438,15 @@ class RedditClient:
         logger.info(f"Attempting to post {post_type} to r/{subreddit_name}: '{title}'")
 
         try:
-            submission = self.reddit.subreddit(subreddit_name).submit(
-                **submission_params
-            )
+            submission = self._submit_with_retry(submission_params)
+            self.note_last_post_time(time.time())
             logger.success(
                 f"Successfully posted {post_type} to r/{subreddit_name}: '{title}'. Post ID: {submission.id}, URL: {submission.shortlink}"
             )
             
             # For CS2 patch notes, also post the formatted body as a comment
-            if event.is_cs2_patchnote:
+            if formatted_body is not None:
                 try:
-                    formatted_body = self._format_post_body(event)
                     comment = submission.reply(formatted_body)
                     logger.success(
                         f"Successfully posted formatted body as comment. Comment ID: {comment.id}"
@@ -228,3 +462,5 @@ class RedditClient:
         except Exception as e:
             self._handle_submission_error(e, subreddit_name)
             return False
+        finally:
+            self._record_rate_limits()
@@ -0,0 +1,255 @@
+"""Polling runtime for the CS2 Update Announcer: clients, state and the poll loop.
+
+Imported lazily by the ``main`` command so other CLI commands (and ``--help``)
+do not load the Steam/Reddit clients.
+"""
+
+import sys
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional, Set, Tuple
+
+import httpx
+import prawcore
+from loguru import logger
+
+from .data_models import AppConfig, ParsedSteamEvent
+from .reddit_client import RedditClient
+from .state_manager import (
+    MAX_RECENT_POSTED_GIDS,
+    get_last_processed_posttime,
+    get_recent_posted_gids,
+    get_steam_cache_validators,
+    load_state,
+    save_state,
+    set_last_processed_posttime,
+    get_last_reddit_post_time,
+    set_last_reddit_post_time,
+    set_recent_posted_gids,
+    set_steam_cache_validators,
+)
+from .steam_client import SteamClient
+
+# Steam poll cadence while Reddit posting is locked out by the post interval
+LOCKOUT_POLL_INTERVAL_SECONDS = 3600
+
+
+def initialize_polling_state(
+    config: AppConfig,
+) -> Tuple[object, Optional[int], Optional[int]]:
+    """Initialize and return the polling state."""
+    app_state = load_state(config)
+    last_posttime = get_last_processed_posttime(app_state)
+    last_reddit_post_time = get_last_reddit_post_time(app_state)
+
+    logger.info(f"Initial last processed event posttime: {last_posttime}")
+    logger.info(f"Initial last Reddit post time: {last_reddit_post_time}")
+
+    return app_state, last_posttime, last_reddit_post_time
+
+
+def should_skip_due_to_rate_limit(next_post_allowed_at: float, now: float) -> bool:
+    """Check if we should skip posting due to rate limiting."""
+    wait_time = int(next_post_allowed_at - now)
+    if wait_time > 0:
+        logger.warning(
+            f"Reddit post rate limit in effect. Next post allowed in {wait_time} seconds."
+        )
+        return True
+
+    return False
+
+
+def compute_poll_interval(config: AppConfig, idle_polls: int) -> int:
+    """Return the wait before the next poll, doubling per consecutive idle poll."""
+    base = config.steam_poll_interval_seconds
+    max_interval = max(base, config.steam_max_poll_interval_seconds)
+    # Cap the exponent; the result is clamped to max_interval anyway.
+    return min(base * 2 ** min(idle_polls, 16), max_interval)
+
+
+def remember_posted_gid(
+    app_state: object, recent_order: Deque[str], recent_gids: Set[str], gid: str
+) -> None:
+    """Record a posted event GID, evicting the oldest once the window is full."""
+    if len(recent_order) == recent_order.maxlen:
+        recent_gids.discard(recent_order[0])
+    recent_order.append(gid)
+    recent_gids.add(gid)
+    set_recent_posted_gids(app_state, recent_order)
+
+
+def adjust_poll_interval_for_reddit(
+    interval: float,
+    reddit_client: RedditClient,
+    now: float,
+    lockout_margin: float,
+) -> float:
+    """Fit the next poll wait to Reddit's API quota and the post window.
+
+    While posting is locked out, Steam is only polled every
+    LOCKOUT_POLL_INTERVAL_SECONDS (to keep skipping events) and again
+    ``lockout_margin`` seconds before the window opens.
+    """
+    remaining = reddit_client.ratelimit_remaining
+    reset_at = reddit_client.ratelimit_reset_timestamp
+    if remaining is not None and reset_at is not None and reset_at > now:
+        # Spread the remaining API quota over what is left of its window
+        interval = max(interval, (reset_at - now) / max(1.0, remaining))
+
+    window_opens_in = reddit_client.next_post_allowed_at - now
+    if window_opens_in > lockout_margin:
+        # Nothing can be posted yet, so don't poll Steam through the lockout
+        interval = max(
+            interval,
+            min(window_opens_in - lockout_margin, LOCKOUT_POLL_INTERVAL_SECONDS),
+        )
+    elif window_opens_in > 0:
+        # Wake when posting becomes possible rather than a full interval later
+        interval = min(interval, window_opens_in)
+
+    return interval
+
+
+def process_event(
+    event: ParsedSteamEvent,
+    app_state: object,
+    reddit_client: RedditClient,
+    last_reddit_post_time: Optional[int],
+    recent_order: Deque[str],
+    recent_gids: Set[str],
+    now: float,
+) -> Tuple[int, Optional[int]]:
+    """Process a single event and return updated timestamps.
+
+    Updates ``app_state`` in memory only; the caller persists it once per cycle.
+    """
+    logger.info("Processing event: GID '{}', Title '{}'", event.gid, event.title)
+
+    # Duplicate-post safeguard: O(1) membership check on recently posted GIDs
+    if event.gid in recent_gids:
+        logger.warning("Event GID '{}' was already posted. Skipping.", event.gid)
+        set_last_processed_posttime(app_state, event.timestamp)
+        return event.timestamp, last_reddit_post_time
+
+    # Check rate limit
+    if should_skip_due_to_rate_limit(reddit_client.next_post_allowed_at, now):
+        # Update state but skip posting
+        set_last_processed_posttime(app_state, event.timestamp)
+        return event.timestamp, last_reddit_post_time
+
+    # Attempt to post
+    success = reddit_client.post_update(event)
+    if success:
+        current_time = int(time.time())
+        set_last_processed_posttime(app_state, event.timestamp)
+        set_last_reddit_post_time(app_state, current_time)
+        remember_posted_gid(app_state, recent_order, recent_gids, event.gid)
+        logger.info("Successfully processed and posted event GID: {}", event.gid)
+        return event.timestamp, current_time
+    else:
+        logger.error(
+            "Failed to post event GID: {}. Will retry in next cycle.", event.gid
+        )
+        return event.timestamp, last_reddit_post_time
+
+
+def polling_loop(
+    config: AppConfig,
+    steam_client: SteamClient,
+    reddit_client: RedditClient,
+    stop: threading.Event,
+):
+    """The main polling loop for fetching updates and posting them.
+
+    Runs until ``stop`` is set; every wait returns as soon as that happens.
+    """
+    app_state, last_posttime, last_reddit_post_time = initialize_polling_state(config)
+    idle_polls = 0
+    recent_order: Deque[str] = deque(
+        get_recent_posted_gids(app_state), maxlen=MAX_RECENT_POSTED_GIDS
+    )
+    recent_gids: Set[str] = set(recent_order)
+    if last_reddit_post_time is not None:
+        reddit_client.note_last_post_time(last_reddit_post_time)
+    # Resume conditional requests across restarts
+    steam_client.set_cache_validators(*get_steam_cache_validators(app_state))
+    # Bind attribute lookups used on every iteration to locals.
+    fetch_latest_event = steam_client.fetch_latest_event
+    wait = stop.wait
+
+    while not stop.is_set():
+        cycle_start = time.monotonic()
+        now = time.time()
+        logger.info("Polling for new CS2 updates...")
+        try:
+            event = fetch_latest_event(last_event_posttime=last_posttime)
+
+            if not event:
+                logger.info("No new event to post.")
+                idle_polls += 1
+            else:
+                idle_polls = 0
+                last_posttime, last_reddit_post_time = process_event(
+                    event,
+                    app_state,
+                    reddit_client,
+                    last_reddit_post_time,
+                    recent_order,
+                    recent_gids,
+                    now,
+                )
+                set_steam_cache_validators(app_state, *steam_client.cache_validators)
+                save_state(app_state, config)  # Single write per polling cycle
+
+        except (
+            prawcore.exceptions.PrawcoreException,
+            httpx.HTTPError,
+            OSError,
+        ) as e:
+            # Transient network/API/IO failures only; programming errors
+            # propagate to main() and stop the process.
+            logger.opt(exception=config.debug).error(
+                f"Unexpected error in polling loop: {e}"
+            )
+            # Refetch in full next time so an unprocessed event isn't hidden by a 304
+            steam_client.set_cache_validators(None, None)
+            if wait(30):  # Wait 30 seconds after error
+                break
+            continue
+
+        interval = adjust_poll_interval_for_reddit(
+            compute_poll_interval(config, idle_polls),
+            reddit_client,
+            now,
+            config.steam_poll_interval_seconds,
+        )
+        logger.opt(lazy=True).debug(
+            "Waiting {} seconds before next poll...", lambda: interval
+        )
+        # Subtract this cycle's work (monotonic clock) so polls don't drift
+        if wait(max(0.0, interval - (time.monotonic() - cycle_start))):
+            break
+
+
+def initialize_clients(
+    app_config: AppConfig, stop: threading.Event
+) -> Tuple[SteamClient, RedditClient]:
+    """Initialize and return Steam and Reddit clients.
+
+    ``stop`` is the polling loop's shutdown event; the Reddit client's
+    retry back-off waits on it.
+    """
+    try:
+        steam_client = SteamClient(app_config)
+        reddit_client = RedditClient(app_config, stop)
+
+        if not hasattr(reddit_client, "reddit"):
+            raise RuntimeError("Reddit client failed to initialize")
+
+        return steam_client, reddit_client
+
+    except Exception as e:
+        logger.critical(f"Failed to initialize clients: {e}", exc_info=True)
+        sys.exit(1)
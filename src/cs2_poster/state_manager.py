@@ -1,29 +1,72 @@
 """Manages the persistent state of the application, like the last seen event ID."""
 
-import json
+import copy
+import os
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable, List, Tuple
+
+import orjson
 from loguru import logger
 
 from .data_models import AppConfig
 
 STATE_KEY_LAST_EVENT_POSTTIME = "last_processed_event_posttime"
 STATE_KEY_LAST_REDDIT_POSTTIME = "last_reddit_post_time"
+STATE_KEY_RECENT_POSTED_GIDS = "recent_posted_gids"
+STATE_KEY_STEAM_ETAG = "steam_etag"
+STATE_KEY_STEAM_LAST_MODIFIED = "steam_last_modified"
+MAX_RECENT_POSTED_GIDS = 256  # Bound for the persisted duplicate-post safeguard
+JOURNAL_COMPACT_BYTES = 4096  # Rewrite the snapshot once the journal grows past this
+_SNAPSHOT_SEQ_KEY = "_journal_seq"  # Last journal entry folded into the snapshot
+
+# Last journal sequence number and copy of the state last written, per state
+# file; the copy is None while the snapshot on disk is missing or out of date
+_persisted: Dict[Path, Tuple[int, Optional[Dict[str, Any]]]] = {}
+
+
+def _journal_path(state_file: Path) -> Path:
+    """Returns the path of the append-only journal kept next to the snapshot."""
+    return state_file.with_name(f"{state_file.name}.journal")
+
+
+def _replay_journal(
+    journal_file: Path, state_data: Dict[str, Any], seq: int
+) -> Tuple[int, bool]:
+    """Applies journal entries newer than ``seq`` to ``state_data``.
+
+    Stops at the first undecodable or malformed line (e.g. a write torn by a
+    crash).
+    Returns the sequence number of the last applied entry and whether the
+    whole journal could be read.
+    """
+    for line in journal_file.read_bytes().splitlines():
+        try:
+            entry = orjson.loads(line)
+            entry_seq, changes = entry["seq"], entry["changes"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning(f"Ignoring truncated entry in state journal {journal_file}")
+            return seq, False
+        if entry_seq > seq:
+            state_data.update(changes)
+            seq = entry_seq
+    return seq, True
 
 
 def load_state(config: AppConfig) -> Dict[str, Any]:
-    """Loads the application state from the state file.
+    """Loads the application state from the state file and its journal.
 
     Returns an empty dict if the file doesn't exist or is invalid.
     """
     state_file = Path(config.state_file_path)
+    journal_file = _journal_path(state_file)
+    state_data: Dict[str, Any] = {}
+    snapshot_loaded = False
     if state_file.exists() and state_file.is_file():
         try:
-            with state_file.open("r", encoding="utf-8") as f:
-                state_data = json.load(f)
-                logger.info(f"Successfully loaded state from {state_file}")
-                return state_data
-        except json.JSONDecodeError as e:
+            state_data = orjson.loads(state_file.read_bytes())
+            snapshot_loaded = True
+            logger.info(f"Successfully loaded state from {state_file}")
+        except orjson.JSONDecodeError as e:
             logger.warning(
                 f"Could not decode JSON from state file {state_file}: {e}. Starting with empty state."
             )
@@ -33,15 +76,94 @@ def load_state(config: AppConfig) -> Dict[str, Any]:
             )
     else:
         logger.info(f"State file {state_file} not found. Starting with empty state.")
-    return {}
+
+    seq = state_data.pop(_SNAPSHOT_SEQ_KEY, 0)
+    journal_intact = True
+    if journal_file.is_file():
+        try:
+            seq, journal_intact = _replay_journal(journal_file, state_data, seq)
+        except IOError as e:
+            logger.warning(f"Could not read state journal {journal_file}: {e}")
+    if not journal_intact:
+        # Entries appended after the torn line would be skipped on the next
+        # load, so fold the recovered state into a fresh snapshot right away
+        try:
+            _write_snapshot(state_file, state_data, seq)
+            snapshot_loaded = True
+        except IOError as e:
+            logger.warning(f"Could not rewrite state file {state_file}: {e}")
+            snapshot_loaded = False  # The first save_state retries the rewrite
+    # Without a current snapshot the first save_state writes one, numbered
+    # past every replayed entry so none of them can be applied over it
+    _persisted[state_file] = (
+        seq,
+        copy.deepcopy(state_data) if snapshot_loaded else None,
+    )
+    return state_data
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Flushes directory entries (renames, unlinks) to disk where supported."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return  # e.g. Windows, where directories cannot be opened for fsync
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_snapshot(state_file: Path, state_data: Dict[str, Any], seq: int) -> None:
+    """Atomically rewrites the full snapshot, then drops the compacted journal."""
+    tmp_file = state_file.with_name(f"{state_file.name}.tmp")
+    with tmp_file.open("wb") as f:
+        f.write(
+            orjson.dumps(
+                {**state_data, _SNAPSHOT_SEQ_KEY: seq}, option=orjson.OPT_INDENT_2
+            )
+        )
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, state_file)
+    _fsync_dir(state_file.parent)  # Make the rename durable before the unlink
+    # Entries left behind by a crash here are ignored on load (seq <= snapshot)
+    _journal_path(state_file).unlink(missing_ok=True)
 
 
 def save_state(state_data: Dict[str, Any], config: AppConfig) -> None:
-    """Saves the application state to the state file."""
+    """Saves the application state.
+
+    Changed keys are appended as one line to a journal next to the state file;
+    the full snapshot is only rewritten once the journal exceeds
+    JOURNAL_COMPACT_BYTES, or when no valid snapshot was loaded.
+    """
     state_file = Path(config.state_file_path)
+    journal_file = _journal_path(state_file)
     try:
-        with state_file.open("w", encoding="utf-8") as f:
-            json.dump(state_data, f, indent=4)
+        last_seq, last_state = _persisted.get(state_file, (0, None))
+        seq = last_seq + 1
+        if last_state is None:
+            _write_snapshot(state_file, state_data, seq)
+        else:
+            changes = {
+                key: value
+                for key, value in state_data.items()
+                if key not in last_state or last_state[key] != value
+            }
+            if not changes:
+                logger.debug("State unchanged; nothing to save.")
+                return
+            if (
+                journal_file.exists()
+                and journal_file.stat().st_size >= JOURNAL_COMPACT_BYTES
+            ):
+                _write_snapshot(state_file, state_data, seq)
+            else:
+                with journal_file.open("ab") as f:
+                    f.write(orjson.dumps({"seq": seq, "changes": changes}) + b"\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+        _persisted[state_file] = (seq, copy.deepcopy(state_data))
         logger.debug(f"Successfully saved state to {state_file}")
     except IOError as e:
         logger.error(f"Could not write state file {state_file}: {e}")
@@ -71,3 +193,28 @@ def set_last_reddit_post_time(state: Dict[str, Any], posttime: int) -> None:
     """Updates the last Reddit post time in the state."""
     state[STATE_KEY_LAST_REDDIT_POSTTIME] = posttime
     logger.info(f"Last Reddit post time set to: {posttime}")
+
+
+def get_recent_posted_gids(state: Dict[str, Any]) -> List[str]:
+    """Retrieves the GIDs of recently posted events (oldest first) from the state."""
+    return state.get(STATE_KEY_RECENT_POSTED_GIDS, [])
+
+
+def set_recent_posted_gids(state: Dict[str, Any], gids: Iterable[str]) -> None:
+    """Updates the GIDs of recently posted events in the state."""
+    state[STATE_KEY_RECENT_POSTED_GIDS] = list(gids)
+
+
+def get_steam_cache_validators(
+    state: Dict[str, Any],
+) -> Tuple[Optional[str], Optional[str]]:
+    """Retrieves the Steam feed's (ETag, Last-Modified) pair from the state."""
+    return state.get(STATE_KEY_STEAM_ETAG), state.get(STATE_KEY_STEAM_LAST_MODIFIED)
+
+
+def set_steam_cache_validators(
+    state: Dict[str, Any], etag: Optional[str], last_modified: Optional[str]
+) -> None:
+    """Updates the Steam feed's (ETag, Last-Modified) pair in the state."""
+    state[STATE_KEY_STEAM_ETAG] = etag
+    state[STATE_KEY_STEAM_LAST_MODIFIED] = last_modified
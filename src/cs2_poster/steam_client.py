@@ -1,27 +1,72 @@
+import hashlib
+import operator
+import re
 import httpx
+import orjson
 from loguru import logger
-from typing import Optional, Dict, Any, List
-from datetime import datetime, UTC
+from typing import Optional, Dict, Any, List, NamedTuple, Tuple
 
 from .data_models import AppConfig, ParsedSteamEvent
 
+POLL_EVENT_COUNT = 5  # Events requested per poll; only the newest is posted
+HISTORY_EVENT_COUNT = 100  # Events requested when a full day is needed for numbering
+SECONDS_PER_DAY = 86400  # Unix time // SECONDS_PER_DAY is the UTC day index
+# Title keywords marking an announcement as patch notes, matched in one scan
+PATCHNOTE_KEYWORDS_RE = re.compile(r"update|release notes|patch", re.IGNORECASE)
+# Announcement page URL, completed with the (string) announcement GID
+EVENT_URL_PREFIX = "https://store.steampowered.com/news/app/730/view/"
+# Required announcement fields, fetched in one C-level call (KeyError if absent)
+_get_announcement_fields = operator.itemgetter("gid", "headline", "posttime")
+
+
+class _EventSummary(NamedTuple):
+    """The few announcement fields needed to pick, date and classify an event."""
+
+    gid: str
+    title: str
+    timestamp: int
+    is_cs2_patchnote: bool
+
+
+def _raw_posttime(event_data: Dict[str, Any]) -> int:
+    """Returns a raw event's announcement posttime, or 0 if it has none."""
+    return (event_data.get("announcement_body") or {}).get("posttime") or 0
+
 
 class SteamClient:
     """
     Handles fetching and parsing CS2 game update events from Steam.
     """
 
-    def __init__(self, config: AppConfig):
+    def __init__(
+        self, config: AppConfig, http_client: Optional[httpx.Client] = None
+    ):
         """
         Initializes the SteamClient with application configuration.
 
         Args:
             config: The application configuration object.
+            http_client: Optional shared httpx client. By default an HTTP/2 client
+                         with a small keep-alive pool is created and reused for every
+                         poll, so connections (and TLS sessions) persist between polls.
         """
         self.config = config
-        self.http_client = httpx.Client(
+        # An injected client belongs to the caller, who closes it
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or httpx.Client(
+            http2=True,
             headers={"User-Agent": "CS2UpdateAnnouncer/1.0"},
             timeout=config.steam_poll_interval_seconds,
+            limits=httpx.Limits(
+                max_connections=4,
+                max_keepalive_connections=2,
+                # httpx drops idle connections after 5s by default, i.e. before
+                # the next poll; keep them for the longest (backed-off) interval
+                keepalive_expiry=max(
+                    config.steam_poll_interval_seconds,
+                    config.steam_max_poll_interval_seconds,
+                ),
+            ),
         )
         self.base_url = (
             "https://store.steampowered.com/events/ajaxgetpartnereventspageable/"
@@ -30,163 +75,325 @@ class SteamClient:
             "clan_accountid": 0,
             "appid": 730,  # CS2 App ID
             "offset": 0,
-            "count": 100,  # Fetch up to 100 events
+            "count": POLL_EVENT_COUNT,
             "l": "english",
             "origin": "https://www.counter-strike.net",
         }
+        # The query never changes, so encode both request URLs once
+        self._poll_url = httpx.URL(self.base_url, params=self.params)
+        self._history_url = httpx.URL(
+            self.base_url, params={**self.params, "count": HISTORY_EVENT_COUNT}
+        )
+        # Validators from the last successful response, sent back on the next
+        # poll so an unchanged feed can be answered with 304 Not Modified.
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+        # Fallback when Steam sends neither: hash of the last response body
+        self._content_hash: Optional[bytes] = None
+        # UTC day -> (posttime, sequence number) of the last patch note numbered
+        self._day_sequence_counts: Dict[int, Tuple[int, int]] = {}
         logger.info("SteamClient initialized.")
 
-    def _parse_event_data(
-        self, event_data: Dict[str, Any], raw_events: Optional[List[Dict[str, Any]]] = None
-    ) -> Optional[ParsedSteamEvent]:
+    @property
+    def cache_validators(self) -> Tuple[Optional[str], Optional[str]]:
+        """The (ETag, Last-Modified) pair from the last successful response."""
+        return self._etag, self._last_modified
+
+    def set_cache_validators(
+        self, etag: Optional[str], last_modified: Optional[str]
+    ) -> None:
+        """
+        Sets the validators sent with the next request.
+
+        Args:
+            etag: ETag to send as If-None-Match, or None.
+            last_modified: Last-Modified value to send as If-Modified-Since, or None.
+                           Passing None for both forces a full fetch. Also forgets
+                           the body-hash fallback.
+        """
+        self._etag = etag
+        self._last_modified = last_modified
+        self._content_hash = None
+
+    def _classify_event(self, event_data: Dict[str, Any]) -> Optional[_EventSummary]:
         """
-        Parses raw event data from Steam into a ParsedSteamEvent object.
+        Reads only the fields needed to identify, date and classify an event.
+
+        Cheap enough to run over a whole page of events: the BBCode body is not
+        touched and nothing is logged.
 
         Args:
             event_data: A dictionary representing a single event from Steam.
-            raw_events: Optional list of all raw events for sequence number calculation.
 
         Returns:
-            A ParsedSteamEvent object if parsing is successful, None otherwise.
+            An _EventSummary, or None if the announcement is missing or lacks its
+            GID, title or posttime.
         """
+        # The event_data itself contains the 'gid' for the event.
+        # The announcement_body also has a 'gid', specific to the announcement.
+        # We need the announcement details.
+        announcement = event_data.get("announcement_body") or {}
         try:
-            # The event_data itself contains the 'gid' for the event.
-            # The announcement_body also has a 'gid', specific to the announcement.
-            # We need the announcement details.
-            announcement = event_data.get("announcement_body")
-            if not announcement:
-                logger.warning(
-                    f"Event data missing 'announcement_body'. Event GID: {event_data.get('gid')}"
-                )
-                return None
+            # posttime is RTime32 (Unix timestamp)
+            ann_gid, title, post_time = _get_announcement_fields(announcement)
+        except KeyError:
+            return None
+        if not ann_gid or not title or post_time is None:
+            return None
 
-            ann_gid = announcement.get("gid")
-            title = announcement.get("headline")
-            post_time = announcement.get("posttime")  # This is RTime32 (Unix timestamp)
-            body_content = announcement.get("body", "")  # BBCode
+        # Process patch notes differently from other announcements.
+        # The category, while visible on the page, isn't accessible via either JSON API or RSS feed.
+        # So we need to check the title for keywords to determine if this is a patch note.
+        # We don't want to post complex announcements as Markdown: we can't render it properly.
+        is_cs2_patchnote = PATCHNOTE_KEYWORDS_RE.search(title) is not None
+        return _EventSummary(ann_gid, title, post_time, is_cs2_patchnote)
 
-            if not ann_gid or not title or post_time is None:
-                logger.warning(
-                    f"Missing GID, title, or posttime in announcement data: {announcement}"
-                )
-                return None
+    def _materialize_event(
+        self,
+        event_data: Dict[str, Any],
+        summary: _EventSummary,
+        sequence_number: int = 1,
+    ) -> ParsedSteamEvent:
+        """
+        Builds the full ParsedSteamEvent for an event that will be returned.
 
-            # Process patch notes differently from other announcements.
-            # The category, while visible on the page, isn't accessible via either JSON API or RSS feed.
-            # So we need to check the title for keywords to determine if this is a patch note.
-            # We don't want to post complex announcements as Markdown: we can't render it properly.
-            normalized_title = title.lower()
-            keywords = ["update", "release notes", "patch"]
-            is_cs2_patchnote = any(keyword in normalized_title for keyword in keywords)
-
-            if not is_cs2_patchnote:
-                logger.debug(
-                    f"Event with title '{title}' doesn't seem to be a CS2 update, but will post as general announcement (announcement GID: {ann_gid})."
-                )
+        Args:
+            event_data: The raw event that produced ``summary``.
+            summary: The event's _EventSummary.
+            sequence_number: The patch note's same-day sequence number.
+        """
+        return ParsedSteamEvent(
+            gid=summary.gid,  # This is the announcement GID
+            title=summary.title,
+            timestamp=summary.timestamp,
+            body_bbcode=event_data["announcement_body"].get("body", ""),  # BBCode
+            url=EVENT_URL_PREFIX + summary.gid,
+            is_cs2_patchnote=summary.is_cs2_patchnote,
+            sequence_number=sequence_number,
+        )
 
-            event_url = f"https://store.steampowered.com/news/app/730/view/{ann_gid}"
-            
-            # Calculate sequence number if raw_events is provided
-            sequence_number = 1
-            if raw_events and is_cs2_patchnote:
-                sequence_number = self._calculate_sequence_number_for_event(post_time, raw_events)
-
-            return ParsedSteamEvent(
-                gid=ann_gid,  # This is the announcement GID
-                title=title,
-                timestamp=post_time,
-                body_bbcode=body_content,
-                url=event_url,
-                is_cs2_patchnote=is_cs2_patchnote,
-                sequence_number=sequence_number,
-            )
-        except Exception as e:
-            logger.error(
-                f"Error parsing event data: {e}. Data: {event_data}", exc_info=True
-            )
-            return None
-            
     def _calculate_sequence_number_for_event(self, target_timestamp: int, raw_events: List[Dict[str, Any]]) -> int:
         """
         Calculate the sequence number for a CS2 patch note within its day.
-        
+
+        Events are only classified (see _classify_event), not materialized.
+
         Args:
             target_timestamp: The timestamp of the target event
             raw_events: All raw event data from the API response (ordered by time)
-            
+
         Returns:
             The sequence number (1 for first patch note of the day, 2 for second, etc.)
         """
-        # Get the date of the target event
-        target_date = datetime.fromtimestamp(target_timestamp, UTC).date()
-        
+        # Get the UTC day of the target event
+        target_day = target_timestamp // SECONDS_PER_DAY
+
         # Count all CS2 patch notes on the same day
         sequence_count = 0
-        
+
         for event_data in raw_events:
-            parsed_event = self._parse_event_data(event_data)  # Don't pass raw_events to avoid recursion
-            if not parsed_event or not parsed_event.is_cs2_patchnote:
+            summary = self._classify_event(event_data)
+            if summary is None or not summary.is_cs2_patchnote:
                 continue
-                
-            event_date = datetime.fromtimestamp(parsed_event.timestamp, UTC).date()
-            if event_date == target_date:
+
+            event_day = summary.timestamp // SECONDS_PER_DAY
+            if event_day == target_day:
                 sequence_count += 1
-            elif event_date < target_date:
+            elif event_day < target_day:
                 # We've moved to an earlier date, stop counting
                 break
-                
+
         return sequence_count
 
+    def _fetch_day_history(self) -> List[Dict[str, Any]]:
+        """Fetches a larger page of raw events, used for same-day numbering."""
+        response = self.http_client.get(self._history_url)
+        response.raise_for_status()
+        return orjson.loads(response.content).get("events", [])
+
+    def _sequence_number(
+        self, timestamp: int, raw_events: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Returns the same-day sequence number of the newest patch note.
+
+        The poll only requests a few events; if all of them fall on the same UTC
+        day as the patch note, earlier ones that day may be missing, so a larger
+        page is fetched to count them. The result is remembered per UTC day, so a
+        later patch note that day is numbered from the poll page alone.
+
+        Args:
+            timestamp: The newest patch note's posttime.
+            raw_events: The raw events from the poll response (newest first).
+        """
+        day = timestamp // SECONDS_PER_DAY
+        counted = self._day_sequence_counts.get(day)
+        if counted is not None and any(
+            _raw_posttime(event_data) <= counted[0] for event_data in raw_events
+        ):
+            # The page reaches back to the last patch note counted today, so
+            # only the ones after it need counting; no history fetch.
+            counted_posttime, sequence_number = counted
+            for event_data in raw_events:
+                summary = self._classify_event(event_data)
+                if (
+                    summary is not None
+                    and summary.is_cs2_patchnote
+                    and summary.timestamp > counted_posttime
+                    and summary.timestamp // SECONDS_PER_DAY == day
+                ):
+                    sequence_number += 1
+        else:
+            oldest_posttime = (raw_events[-1].get("announcement_body") or {}).get(
+                "posttime"
+            )
+            if (
+                len(raw_events) >= POLL_EVENT_COUNT
+                and oldest_posttime is not None
+                and oldest_posttime // SECONDS_PER_DAY == day
+            ):
+                raw_events = self._fetch_day_history()
+            sequence_number = self._calculate_sequence_number_for_event(
+                timestamp, raw_events
+            )
+
+        # Only today's count can be extended, so older days are dropped
+        self._day_sequence_counts = {day: (timestamp, sequence_number)}
+        return sequence_number
+
+    def _latest_event(
+        self, data: Dict[str, Any], last_event_posttime: Optional[int]
+    ) -> Optional[ParsedSteamEvent]:
+        """
+        Picks the newest event from a decoded poll response.
+
+        Args:
+            data: The decoded JSON response.
+            last_event_posttime: The Unix timestamp of the last processed event.
+
+        Returns:
+            The newest event as a ParsedSteamEvent if it's new, otherwise None.
+        """
+        if not data.get("success") == 1:
+            logger.error(
+                f"Steam API indicated failure: {data.get('err_msg', 'No error message')}"
+            )
+            return None
+
+        raw_events = data.get("events", [])
+        if not raw_events:
+            return None
+
+        # Steam orders events newest first, but pick the max in one pass
+        # rather than trust the position of a single entry.
+        event_data = max(raw_events, key=_raw_posttime)
+
+        # Skip parsing entirely unless the event is newer than the last one
+        if (
+            last_event_posttime is not None
+            and _raw_posttime(event_data) <= last_event_posttime
+        ):
+            return None
+
+        summary = self._classify_event(event_data)
+        if summary is None:
+            logger.warning(
+                f"Missing announcement, GID, title, or posttime in event data. Event GID: {event_data.get('gid')}"
+            )
+            return None
+
+        if summary.is_cs2_patchnote:
+            sequence_number = self._sequence_number(summary.timestamp, raw_events)
+        else:
+            logger.debug(
+                "Event with title '{}' doesn't seem to be a CS2 update, but will post as general announcement (announcement GID: {}).",
+                summary.title,
+                summary.gid,
+            )
+            sequence_number = 1
+        return self._materialize_event(event_data, summary, sequence_number)
+
     def fetch_latest_event(
         self, last_event_posttime: Optional[int] = None
     ) -> Optional[ParsedSteamEvent]:
         """
         Fetches the latest CS2 event from Steam.
 
+        Unchanged feeds are detected without decoding the response: by a 304
+        reply to the conditional request or, if Steam sent no validators, by
+        the response body's hash.
+
         Args:
             last_event_posttime: The Unix timestamp of the last processed event.
                                  Only an event newer than this will be returned.
 
         Returns:
             The latest ParsedSteamEvent if it's new, otherwise None.
+
+        Raises:
+            httpx.HTTPError: If a request fails; the polling loop handles it.
         """
+        response = None  # Unset if the request cannot even be built
         try:
-            response = self.http_client.get(self.base_url, params=self.params)
-            response.raise_for_status()
-            data = response.json()
+            conditional_headers = {}
+            if self._etag:
+                conditional_headers["If-None-Match"] = self._etag
+            if self._last_modified:
+                conditional_headers["If-Modified-Since"] = self._last_modified
 
-            if not data.get("success") == 1:
-                logger.error(
-                    f"Steam API indicated failure: {data.get('err_msg', 'No error message')}"
-                )
-                return None
-
-            raw_events = data.get("events", [])
-            if not raw_events:
+            response = self.http_client.get(
+                self._poll_url, headers=conditional_headers
+            )
+            if response.status_code == 304:
+                logger.debug("Steam events feed not modified since last poll.")
                 return None
+            response.raise_for_status()
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            content_hash = None
+            if not etag and not last_modified:
+                content_hash = hashlib.blake2b(
+                    response.content, digest_size=16
+                ).digest()
+                if content_hash == self._content_hash:
+                    logger.debug("Steam events feed unchanged since last poll.")
+                    return None
 
-            # Steam returns events ordered by time (newest first).
-            event_data = raw_events[0]
-            parsed_event = self._parse_event_data(event_data, raw_events)
-                
-            # If we have no last event time, or this event is newer, process it
-            if parsed_event and (
-                last_event_posttime is None
-                or parsed_event.timestamp > last_event_posttime
-            ):
-                return parsed_event
-
-            # No new events found
-            return None
+            event = self._latest_event(
+                orjson.loads(response.content), last_event_posttime
+            )
+            # Only remember the response once it has been fully handled, so a
+            # failure above (e.g. in the history fetch) is retried next poll
+            # rather than hidden behind a 304 or a matching hash.
+            self._etag = etag
+            self._last_modified = last_modified
+            self._content_hash = content_hash
+            return event
 
-        except Exception as e:
-            logger.error(f"Error fetching or parsing Steam event: {e}", exc_info=True)
+        except (ValueError, LookupError, TypeError) as e:
+            if response is None:
+                # e.g. a persisted validator that is not a valid header value;
+                # drop the validators so the next poll is a plain full fetch
+                logger.opt(exception=self.config.debug).error(
+                    f"Error building Steam events request: {e}"
+                )
+                self.set_cache_validators(None, None)
+                return None
+            # Malformed or unexpectedly shaped JSON; other errors are bugs and
+            # propagate. Only the start of the body is logged (it can be large).
+            logger.opt(exception=self.config.debug).error(
+                "Error parsing Steam events response: {}. Body starts: {!r}",
+                e,
+                response.content[:500],
+            )
             return None
 
     def close(self):
         """
-        Closes the httpx client.
+        Closes the httpx client, unless it was passed in by the caller.
         """
+        if not self._owns_http_client:
+            return
         logger.info("Closing SteamClient's HTTP client...")
         self.http_client.close()
         logger.info("SteamClient's HTTP client closed.")